@@ -24,10 +24,18 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: Optional[str] = None
     REDIS_SSL: bool = False
     REDIS_TIMEOUT: int = 5
+    REDIS_MAX_CONNECTIONS: int = 100
+    REDIS_POOL_TIMEOUT: float = 1.0
+    REDIS_CONNECT_TIMEOUT: float = 2.0
+    REDIS_SOCKET_KEEPALIVE: bool = True
     CACHE_TTL: int = 3600
     CACHE_ENABLED: bool = True
-    
-    LOG_LEVEL: str = "INFO" 
+    L1_MAX: int = 1024
+    L1_TTL: int = 60
+
+    BATCH_CONCURRENCY: int = 8
+
+    LOG_LEVEL: str = "INFO"
     MAX_RETRIES: int = 3
     TIMEOUT_SECONDS: int = 30
     DEBUG: bool = False
@@ -1,5 +1,7 @@
-from enum import Enum
-from typing import Dict
+from types import MappingProxyType
+from typing import Mapping
+
+from app.models.query import QueryType
 
 class CacheTTL:
     DEFAULT = 86400
@@ -23,17 +25,11 @@ class CacheErrorMessages:
     SERIALIZATION_ERROR = "Failed to serialize cache data"
     DESERIALIZATION_ERROR = "Failed to deserialize cache data"
 
-class QueryType(str, Enum):
-    NEWS = "news"
-    LOCATION = "location"
-    BUSINESS = "business"
-    INVESTMENT = "investment"
-    GENERAL = "general"
-
-TTL_MAPPING: Dict[str, int] = {
-    QueryType.NEWS.value: CacheTTL.NEWS,
-    QueryType.LOCATION.value: CacheTTL.LOCATION,
-    QueryType.BUSINESS.value: CacheTTL.BUSINESS,
-    QueryType.INVESTMENT.value: CacheTTL.INVESTMENT,
-    QueryType.GENERAL.value: CacheTTL.DEFAULT
-}
\ No newline at end of file
+TTL_MAPPING: Mapping[QueryType, int] = MappingProxyType({
+    QueryType.NEWS: CacheTTL.NEWS,
+    QueryType.LOCATION: CacheTTL.LOCATION,
+    QueryType.BUSINESS_MODEL: CacheTTL.BUSINESS,
+    QueryType.INVESTMENTS: CacheTTL.INVESTMENT,
+    QueryType.CUSTOMERS: CacheTTL.BUSINESS,
+    QueryType.GENERAL: CacheTTL.DEFAULT
+})
@@ -1,5 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
+from functools import lru_cache
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
@@ -11,7 +12,7 @@ from app.models.query import CompanyQuery
 from app.models.response import QueryResponse
 from app.utils.logger import logger, log_error
 from app.config import get_settings
-from langsmith import Client
+from langsmith import AsyncClient
 
 settings = get_settings()
 
@@ -20,30 +21,43 @@ LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "company_information_system")
 LANGSMITH_ENDPOINT = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
 LANGSMITH_TRACING = os.getenv("LANGSMITH_TRACING", "false").lower() == "true"
 
-langsmith_client = None
-if LANGSMITH_TRACING and LANGSMITH_API_KEY:
+_langsmith_client: Optional[AsyncClient] = None
+
+async def get_langsmith_client() -> Optional[AsyncClient]:
+    """Create the LangSmith client on first await instead of at import."""
+    global _langsmith_client
+    if not (LANGSMITH_TRACING and LANGSMITH_API_KEY):
+        return None
+    if _langsmith_client is None:
+        try:
+            _langsmith_client = AsyncClient(
+                api_key=LANGSMITH_API_KEY,
+                api_url=LANGSMITH_ENDPOINT
+            )
+            logger.info("LangSmith client initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize LangSmith client: {e}")
+            return None
+    return _langsmith_client
+
+@lru_cache(maxsize=1)
+def get_tracer() -> Optional[LangChainTracer]:
+    if not (LANGSMITH_TRACING and LANGSMITH_API_KEY):
+        return None
     try:
-        langsmith_client = Client(
-            api_key=LANGSMITH_API_KEY,
-            api_url=LANGSMITH_ENDPOINT
+        tracer = LangChainTracer(
+            project_name=LANGSMITH_PROJECT
         )
-        logger.info("LangSmith client initialized successfully")
+        logger.info("LangChain tracer initialized successfully")
+        return tracer
     except Exception as e:
-        logger.error(f"Failed to initialize LangSmith client: {e}")
+        logger.error(f"Failed to initialize LangChain tracer: {e}")
+        return None
 
 class CompanyInfoChain:
     def __init__(self, config: Dict[str, str]):
         self.query_parser = QueryParser(config)
         self.data_retriever = DataRetriever(config)
         self.data_evaluator = DataEvaluator(config)
-        
-        self.tracer = None
-        if LANGSMITH_TRACING and LANGSMITH_API_KEY:
-            try:
-                self.tracer = LangChainTracer(
-                    project_name=LANGSMITH_PROJECT
-                )
-                logger.info("LangChain tracer initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize LangChain tracer: {e}")
+        self.tracer = get_tracer()
         
\ No newline at end of file
@@ -1,23 +1,251 @@
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, TypedDict
+import xxhash
 from langchain_core.runnables import RunnablePassthrough
 from langgraph.graph import StateGraph
-from pydantic import BaseModel
 from app.models.query import QueryAnalysis, IntentAnalysis, AmbiguityCheck
 from app.models.response import QueryResponse, ValidationResult
 from app.services.query_parser import QueryParser
 from app.services.data_retriever import DataRetriever
 from app.services.evaluator import DataEvaluator
+from app.services.cache import RedisCacheService
+from app.constants.cache_constants import CacheTTL, CachePrefix
 from app.utils.logger import logger
 
-class WorkflowState(BaseModel):
+# Prebuilt fallback payloads; constructing these per failure would re-run
+# Pydantic validation on every error path.
+_INTENT_FAIL_CHECK = AmbiguityCheck(
+    is_ambiguous=True,
+    clarification_message="Failed to analyze query intent",
+    confidence_score=0.0
+)
+_CLARIFICATION_EVAL = ValidationResult(
+    is_valid=False,
+    confidence_score=0.0,
+    missing_information=["Query requires clarification"]
+)
+_EVAL_ERROR_EVAL = ValidationResult(
+    is_valid=False,
+    confidence_score=0.0,
+    missing_information=["Error evaluating data"]
+)
+_NO_DATA_RESPONSE = QueryResponse(
+    response="Could not find enough reliable information to answer your query",
+    confidence_score=0.0
+)
+_GENERATION_ERROR_RESPONSE = QueryResponse(
+    response="An error occurred while generating the response",
+    confidence_score=0.0
+)
+_PROCESSING_ERROR_RESPONSE = QueryResponse(
+    response="An error occurred while processing your query",
+    confidence_score=0.0
+)
+_FAILED_RESPONSE = QueryResponse(
+    response="Failed to process query",
+    confidence_score=0.0
+)
+
+class WorkflowServices:
+    """Bundles the service instances that graph nodes need at runtime."""
+
+    def __init__(self, query_parser: QueryParser, data_retriever: DataRetriever,
+                 data_evaluator: DataEvaluator, cache: RedisCacheService):
+        self.query_parser = query_parser
+        self.data_retriever = data_retriever
+        self.data_evaluator = data_evaluator
+        self.cache = cache
+
+class WorkflowState(TypedDict, total=False):
     query: str
-    intent: IntentAnalysis | None = None
-    ambiguity_check: AmbiguityCheck | None = None
-    wiki_results: Dict[str, Any] | None = None
-    tavily_results: Dict[str, Any] | None = None
-    evaluation: ValidationResult | None = None
-    response: QueryResponse | None = None
-    requires_clarification: bool = False
+    services: Any
+    intent: IntentAnalysis | None
+    ambiguity_check: AmbiguityCheck | None
+    wiki_results: Dict[str, Any] | None
+    tavily_results: Dict[str, Any] | None
+    combined_results: List[Dict[str, Any]] | None
+    evaluation: ValidationResult | None
+    response: QueryResponse | None
+    requires_clarification: bool
+
+async def analyze_query(state: WorkflowState) -> Dict:
+    """Run intent analysis and ambiguity detection as one LLM call.
+
+    Both sections are cached under their existing prefixes; a full hit
+    skips the LLM entirely, anything less re-runs the combined call.
+    """
+    services = state["services"]
+    try:
+        # Cache reads and writes are best-effort: a Redis blip must not
+        # fail the analysis or discard a completed LLM result.
+        cached_intent = cached_check = None
+        try:
+            cached_intent, cached_check = await services.cache.mget_cached([
+                (state["query"], CachePrefix.INTENT),
+                (state["query"], CachePrefix.AMBIGUITY)
+            ])
+        except Exception as e:
+            logger.error(f"Query analysis cache read error: {str(e)}")
+
+        if cached_intent and cached_check:
+            check = AmbiguityCheck(**cached_check)
+            return {
+                "intent": IntentAnalysis(**cached_intent),
+                "ambiguity_check": check,
+                "requires_clarification": check.is_ambiguous
+            }
+
+        combined = await services.query_parser.analyze(state["query"])
+        logger.info(f"Analyzed query: {state['query']}")
+        try:
+            await services.cache.set_cached_data(
+                state["query"],
+                CachePrefix.INTENT,
+                combined.intent.model_dump(),
+                ttl=CacheTTL.DEFAULT
+            )
+            await services.cache.set_cached_data(
+                state["query"],
+                CachePrefix.AMBIGUITY,
+                combined.ambiguity.model_dump(),
+                ttl=CacheTTL.DEFAULT
+            )
+        except Exception as e:
+            logger.error(f"Query analysis cache write error: {str(e)}")
+        return {
+            "intent": combined.intent,
+            "ambiguity_check": combined.ambiguity,
+            "requires_clarification": combined.ambiguity.is_ambiguous
+        }
+    except Exception as e:
+        logger.error(f"Query analysis error: {str(e)}")
+        return {
+            "intent": None,
+            "ambiguity_check": _INTENT_FAIL_CHECK,
+            "requires_clarification": True
+        }
+
+async def retrieve_sources(state: WorkflowState) -> Dict:
+    services = state["services"]
+    if not state.get("intent") or state.get("requires_clarification", False):
+        return {"wiki_results": None, "tavily_results": None, "combined_results": None}
+
+    retrieved = await services.data_retriever.retrieve_all(state.get("intent"))
+    wiki_data = retrieved["wikipedia"]
+    tavily_data = retrieved["tavily"]
+
+    combined_results = wiki_data.get("results", []) + tavily_data.get("results", [])
+    return {
+        "wiki_results": wiki_data,
+        "tavily_results": tavily_data,
+        "combined_results": combined_results
+    }
+
+async def evaluate_data(state: WorkflowState) -> Dict:
+    services = state["services"]
+    if state.get("requires_clarification", False):
+        return {"evaluation": _CLARIFICATION_EVAL}
+
+    try:
+        combined_data = {
+            "wikipedia": state.get("wiki_results").get("results", []) if state.get("wiki_results") else [],
+            "tavily": state.get("tavily_results").get("results", []) if state.get("tavily_results") else [],
+            "combined": state.get("combined_results") or []
+        }
+
+        query_analysis = QueryAnalysis(
+            intent_analysis=state.get("intent"),
+            ambiguity_check=state.get("ambiguity_check"),
+            original_query=state["query"],
+            requires_clarification=state.get("requires_clarification", False)
+        )
+
+        evaluation = await services.data_evaluator.evaluate_data(query_analysis, combined_data)
+        return {"evaluation": evaluation}
+    except Exception as e:
+        logger.error(f"Data evaluation error: {str(e)}")
+        return {"evaluation": _EVAL_ERROR_EVAL}
+
+async def generate_response(state: WorkflowState) -> Dict:
+    services = state["services"]
+    try:
+        if state.get("requires_clarification", False):
+            clarification_msg = (
+                state.get("ambiguity_check").clarification_message
+                if state.get("ambiguity_check") and state.get("ambiguity_check").clarification_message
+                else "Please clarify your query"
+            )
+            return {
+                "response": QueryResponse(
+                    response=clarification_msg,
+                    confidence_score=0.0
+                )
+            }
+
+        if not state.get("evaluation") or not state.get("evaluation").is_valid:
+            return {"response": _NO_DATA_RESPONSE}
+
+        combined_data = {
+            "wikipedia": state.get("wiki_results").get("results", []) if state.get("wiki_results") else [],
+            "tavily": state.get("tavily_results").get("results", []) if state.get("tavily_results") else [],
+            "combined": state.get("combined_results") or []
+        }
+
+        response_text = services.data_evaluator._format_final_response(
+            state.get("evaluation"),
+            combined_data
+        )
+
+        return {
+            "response": QueryResponse(
+                response=response_text,
+                confidence_score=state.get("evaluation").confidence_score
+            )
+        }
+    except Exception as e:
+        logger.error(f"Response generation error: {str(e)}")
+        return {"response": _GENERATION_ERROR_RESPONSE}
+
+def _strip_fp(items: List[Any]) -> List[Any]:
+    return [
+        {k: v for k, v in item.items() if k != "fp"} if isinstance(item, dict) else item
+        for item in items
+    ]
+
+def _sanitize_update(update: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop internal state (service handles, dedup fingerprints) from a
+    streamed graph update before it is serialized for the client."""
+    clean: Dict[str, Any] = {}
+    for key, value in update.items():
+        if key == "services":
+            continue
+        if key in ("wiki_results", "tavily_results") and isinstance(value, dict):
+            value = {**value, "results": _strip_fp(value.get("results", []))}
+        elif key == "combined_results" and isinstance(value, list):
+            value = _strip_fp(value)
+        clean[key] = value
+    return clean
+
+def _build_graph() -> StateGraph:
+    graph = StateGraph(WorkflowState)
+
+    #Add nodes to graph
+    graph.add_node("analyze_query", analyze_query)
+    graph.add_node("retrieve_sources", retrieve_sources)
+    graph.add_node("evaluate_results", evaluate_data)
+    graph.add_node("generate_response", generate_response)
+
+    # Define edges
+    graph.add_edge("analyze_query", "retrieve_sources")
+    graph.add_edge("retrieve_sources", "evaluate_results")
+    graph.add_edge("evaluate_results", "generate_response")
+
+    # b Set entry point
+    graph.set_entry_point("analyze_query")
+
+    return graph.compile()
+
+_COMPILED_GRAPH = _build_graph()
 
 class CompanyInfoWorkflow:
     def __init__(self, config: Dict[str, str]):
@@ -25,221 +253,84 @@ class CompanyInfoWorkflow:
         self.query_parser = QueryParser(config)
         self.data_retriever = DataRetriever(config)
         self.data_evaluator = DataEvaluator(config)
-        self.graph = self._build_graph()
+        self.cache = RedisCacheService()
+        self._services = WorkflowServices(
+            self.query_parser,
+            self.data_retriever,
+            self.data_evaluator,
+            self.cache
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.graph = _COMPILED_GRAPH
 
-    def _build_graph(self) -> StateGraph:
-        graph = StateGraph(WorkflowState)
+    async def stream_query(self, query: str):
+        """Yield per-node graph updates as they are produced.
 
-        async def analyze_intent(state: WorkflowState) -> Dict:
-            try:
-                intent = await self.query_parser.analyze_intent(state.query)
-                logger.info(f"Analyzed intent for query: {state.query}")
-                return {
-                    "intent": intent,
-                    "ambiguity_check": None,
-                    "requires_clarification": False
-                }
-            except Exception as e:
-                logger.error(f"Intent analysis error: {str(e)}")
-                return {
-                    "intent": None,
-                    "ambiguity_check": AmbiguityCheck(
-                        is_ambiguous=True,
-                        clarification_message="Failed to analyze query intent",
-                        confidence_score=0.0
-                    ),
-                    "requires_clarification": True
-                }
-
-        async def check_ambiguity(state: WorkflowState) -> Dict:
-            if not state.intent:
-                return {
-                    "requires_clarification": True,
-                    "ambiguity_check": AmbiguityCheck(
-                        is_ambiguous=True,
-                        clarification_message="Could not determine query intent",
-                        confidence_score=0.0
-                    )
-                }
-            
-            try:
-                check = await self.query_parser.check_ambiguity(
-                    state.query,
-                    {
-                        "wiki": state.wiki_results.get("results", []) if state.wiki_results else [],
-                        "tavily": state.tavily_results.get("results", []) if state.tavily_results else []
-                    }
-                )
-                return {
-                    "ambiguity_check": check,
-                    "requires_clarification": check.is_ambiguous
-                }
-            except Exception as e:
-                logger.error(f"Ambiguity check error: {str(e)}")
-                return {
-                    "requires_clarification": True,
-                    "ambiguity_check": AmbiguityCheck(
-                        is_ambiguous=True,
-                        clarification_message="Error checking query ambiguity",
-                        confidence_score=0.0
-                    )
-                }
-
-        async def retrieve_wiki_data(state: WorkflowState) -> Dict:
-            if not state.intent or state.requires_clarification:
-                return {"wiki_results": None}
-            
-            try:
-                wiki_data = await self.data_retriever.retrieve_wikipedia_data(state.intent)
-                return {"wiki_results": wiki_data}
-            except Exception as e:
-                logger.error(f"Wikipedia retrieval error: {str(e)}")
-                return {"wiki_results": {"results": [], "source": "Wikipedia"}}
+        Streams in "updates" mode so each event carries only the node's
+        state delta, and scrubs internal fields before anything reaches
+        the client.
+        """
+        if not isinstance(query, str):
+            raise ValueError("Query must be a string")
 
-        async def retrieve_tavily_data(state: WorkflowState) -> Dict:
-            if not state.intent or state.requires_clarification:
-                return {"tavily_results": None}
-            
-            try:
-                tavily_data = await self.data_retriever.retrieve_tavily_data(state.intent)
-                return {"tavily_results": tavily_data}
-            except Exception as e:
-                logger.error(f"Tavily retrieval error: {str(e)}")
-                return {"tavily_results": {"results": [], "source": "Tavily"}}
-
-        async def evaluate_data(state: WorkflowState) -> Dict:
-            if state.requires_clarification:
-                return {
-                    "evaluation": ValidationResult(
-                        is_valid=False,
-                        confidence_score=0.0,
-                        missing_information=["Query requires clarification"]
-                    )
-                }
-                
-            try:
-                wiki_results = state.wiki_results.get("results", []) if state.wiki_results else []
-                tavily_results = state.tavily_results.get("results", []) if state.tavily_results else []
-                
-                combined_data = {
-                    "wikipedia": wiki_results,
-                    "tavily": tavily_results,
-                    "combined": wiki_results + tavily_results
-                }
-
-                query_analysis = QueryAnalysis(
-                    intent_analysis=state.intent,
-                    ambiguity_check=state.ambiguity_check,
-                    original_query=state.query,
-                    requires_clarification=state.requires_clarification
-                )
+        initial_state = WorkflowState(query=query, services=self._services)
+        async for event in self.graph.astream(initial_state, stream_mode="updates"):
+            yield {
+                node: _sanitize_update(update)
+                for node, update in event.items()
+                if isinstance(update, dict)
+            }
 
-                evaluation = await self.data_evaluator.evaluate_data(query_analysis, combined_data)
-                return {"evaluation": evaluation}
-            except Exception as e:
-                logger.error(f"Data evaluation error: {str(e)}")
-                return {
-                    "evaluation": ValidationResult(
-                        is_valid=False,
-                        confidence_score=0.0,
-                        missing_information=["Error evaluating data"]
-                    )
-                }
-
-        async def generate_response(state: WorkflowState) -> Dict:
-            try:
-                if state.requires_clarification:
-                    clarification_msg = (
-                        state.ambiguity_check.clarification_message
-                        if state.ambiguity_check and state.ambiguity_check.clarification_message
-                        else "Please clarify your query"
-                    )
-                    return {
-                        "response": QueryResponse(
-                            response=clarification_msg,
-                            confidence_score=0.0
-                        )
-                    }
-
-                if not state.evaluation or not state.evaluation.is_valid:
-                    return {
-                        "response": QueryResponse(
-                            response="Could not find enough reliable information to answer your query",
-                            confidence_score=0.0
-                        )
-                    }
-                
-                combined_data = {
-                    "wikipedia": state.wiki_results.get("results", []) if state.wiki_results else [],
-                    "tavily": state.tavily_results.get("results", []) if state.tavily_results else [],
-                    "combined": (
-                        (state.wiki_results.get("results", []) if state.wiki_results else []) +
-                        (state.tavily_results.get("results", []) if state.tavily_results else [])
-                    )
-                }
-
-                response_text = self.data_evaluator._format_final_response(
-                    state.evaluation,
-                    combined_data
-                )
+    async def process_query(self, query: str) -> QueryResponse:
+        if not isinstance(query, str):
+            raise ValueError("Query must be a string")
 
-                return {
-                    "response": QueryResponse(
-                        response=response_text,
-                        confidence_score=state.evaluation.confidence_score
-                    )
-                }
-            except Exception as e:
-                logger.error(f"Response generation error: {str(e)}")
-                return {
-                    "response": QueryResponse(
-                        response="An error occurred while generating the response",
-                        confidence_score=0.0
-                    )
-                }
-
-        #Add nodes to graph
-        graph.add_node("analyze_intent", analyze_intent)
-        graph.add_node("check_ambiguity", check_ambiguity)
-        graph.add_node("get_wiki_data", retrieve_wiki_data)
-        graph.add_node("get_tavily_data", retrieve_tavily_data)
-        graph.add_node("evaluate_results", evaluate_data)
-        graph.add_node("generate_response", generate_response)
-
-        # Define edges
-        graph.add_edge("analyze_intent", "check_ambiguity")
-        graph.add_edge("check_ambiguity", "get_wiki_data")
-        graph.add_edge("check_ambiguity", "get_tavily_data")
-        graph.add_edge("get_wiki_data", "evaluate_results")
-        graph.add_edge("get_tavily_data", "evaluate_results")
-        graph.add_edge("evaluate_results", "generate_response")
-
-        # b Set entry point
-        graph.set_entry_point("analyze_intent")
-
-        return graph.compile()
+        key = xxhash.xxh3_64_hexdigest(query.encode())
+        existing = self._inflight.get(key)
+        if existing is not None:
+            return await asyncio.shield(existing)
 
-    async def process_query(self, query: str) -> QueryResponse:
+        task = asyncio.ensure_future(self._run_query(query))
+        self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run_query(self, query: str) -> QueryResponse:
         try:
-            if not isinstance(query, str):
-                raise ValueError("Query must be a string")
-                
-            initial_state = WorkflowState(query=query)
+            # Cache unavailability degrades to uncached operation; it must
+            # never abort the run or discard a finished response.
+            cached_response = None
+            try:
+                cached_response = await self.cache.get_cached_data(query, "final_response")
+            except Exception as e:
+                logger.error(f"Response cache read error: {str(e)}")
+            if cached_response:
+                return QueryResponse(**cached_response)
+
+            initial_state = WorkflowState(query=query, services=self._services)
             final_state = await self.graph.ainvoke(initial_state)
-            
+
             if isinstance(final_state, dict) and "response" in final_state:
                 response = final_state["response"]
                 if isinstance(response, QueryResponse):
+                    evaluation = final_state.get("evaluation")
+                    if evaluation and evaluation.is_valid:
+                        intent = final_state.get("intent")
+                        try:
+                            await self.cache.set_cached_data(
+                                query,
+                                "final_response",
+                                response.model_dump(),
+                                ttl=self.cache._calculate_ttl(intent.query_type) if intent else None
+                            )
+                        except Exception as e:
+                            logger.error(f"Response cache write error: {str(e)}")
                     return response
-                
-            return QueryResponse(
-                response="Failed to process query",
-                confidence_score=0.0
-            )
-            
+
+            return _FAILED_RESPONSE
+
         except Exception as e:
             logger.error(f"Error in workflow: {str(e)}")
-            return QueryResponse(
-                response="An error occurred while processing your query",
-                confidence_score=0.0
-            )
\ No newline at end of file
+            return _PROCESSING_ERROR_RESPONSE
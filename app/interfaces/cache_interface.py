@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Optional, Any, Dict, List
 
+from app.models.query import QueryType
+
 class ICacheService(ABC):
     
     @abstractmethod
@@ -29,7 +31,7 @@ class ICacheService(ABC):
         pass
 
     @abstractmethod
-    def _calculate_ttl(self, query_type: str) -> int:
+    def _calculate_ttl(self, query_type: QueryType) -> int:
         pass
 
     @abstractmethod
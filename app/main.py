@@ -1,9 +1,15 @@
+import asyncio
+from typing import Any, List
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.query import CompanyQuery
 from app.models.response import QueryResponse
 from app.core.workflow import CompanyInfoWorkflow
+from app.services.llm import close_http_client
+from app.utils.cache_service import start_cache_writer, stop_cache_writer
 from app.config import get_settings
-from app.utils.logger import logger, log_error
+from app.utils.logger import logger, log_error, shutdown_logging
 
 settings = get_settings()
 
@@ -23,6 +29,21 @@ config = {
 
 workflow = CompanyInfoWorkflow(config)
 
+@app.on_event("startup")
+async def warm_connections():
+    """Prime the Redis connection pool so the first query skips cold-start cost."""
+    start_cache_writer()
+    healthy = await workflow.cache.health_check()
+    if not healthy:
+        logger.warning("Redis warmup ping failed; cache may be unavailable")
+
+@app.on_event("shutdown")
+async def shutdown_cache():
+    await stop_cache_writer()
+    await workflow.data_retriever.cache.close()
+    await close_http_client()
+    shutdown_logging()
+
 @app.post("/query", response_model=QueryResponse, tags=["Company Information"])
 @log_error(logger)
 async def process_query(query: CompanyQuery):
@@ -39,6 +60,45 @@ async def process_query(query: CompanyQuery):
             }
         )
 
+def _serialize_event(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+@app.post("/query/stream", tags=["Company Information"])
+@log_error(logger)
+async def process_query_stream(query: CompanyQuery):
+    async def event_stream():
+        try:
+            async for event in workflow.stream_query(query.query):
+                yield orjson.dumps(event, default=_serialize_event) + b"\n"
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield orjson.dumps({"error": str(e)}) + b"\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+batch_semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+async def _run_limited(query: CompanyQuery) -> QueryResponse:
+    async with batch_semaphore:
+        return await workflow.process_query(query.query)
+
+@app.post("/query/batch", response_model=List[QueryResponse], tags=["Company Information"])
+@log_error(logger)
+async def process_query_batch(queries: List[CompanyQuery]):
+    try:
+        return await asyncio.gather(*[_run_limited(q) for q in queries])
+    except Exception as e:
+        logger.error(f"Error processing batch query: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal server error",
+                "message": str(e)
+            }
+        )
+
 @app.get("/health", tags=["Health Check"])
 async def health_check():
     """Check if the API is healthy"""
@@ -27,6 +27,11 @@ class AmbiguityCheck(BaseModel):
     possible_interpretations: Optional[List[str]] = Field(None, description="List of possible interpretations")
     confidence_score: float = Field(..., ge=0.0, le=1.0, description="Confidence in the analysis")
 
+class CombinedAnalysis(BaseModel):
+    """Intent and ambiguity sections produced by a single LLM call."""
+    intent: IntentAnalysis
+    ambiguity: AmbiguityCheck
+
 class QueryAnalysis(BaseModel):
     intent_analysis: IntentAnalysis
     ambiguity_check: Optional[AmbiguityCheck] = None
@@ -1,12 +1,15 @@
 from typing import Optional, Any, Dict
-import json
-import hashlib
 from datetime import datetime
+import orjson
+import xxhash
 import redis
+import redis.asyncio as aioredis
+from cachetools import TTLCache
 from app.config import get_settings
 from app.utils.logger import logger, log_error
 from app.interfaces.cache_interface import ICacheService
-from app.constants.cache_constants import CacheTTL, CachePrefix, QueryType, TTL_MAPPING
+from app.constants.cache_constants import CacheTTL, CachePrefix, TTL_MAPPING
+from app.models.query import QueryType
 from app.exceptions.cache_exceptions import (
     CacheConnectionError,
     CacheOperationError,
@@ -17,25 +20,50 @@ from app.exceptions.cache_exceptions import (
 
 settings = get_settings()
 
+_connection_pool: Optional[aioredis.BlockingConnectionPool] = None
+
+def get_connection_pool() -> aioredis.BlockingConnectionPool:
+    """Return the shared Redis connection pool, creating it on first use."""
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = aioredis.BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            connection_class=aioredis.SSLConnection if settings.REDIS_SSL else aioredis.Connection,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_keepalive=settings.REDIS_SOCKET_KEEPALIVE,
+            retry_on_timeout=True,
+            decode_responses=True
+        )
+    return _connection_pool
+
 class RedisCacheService(ICacheService):
     def __init__(self):
         try:
-            self.redis_client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                db=settings.REDIS_DB,
-                password=settings.REDIS_PASSWORD,
-                ssl=settings.REDIS_SSL,
-                socket_timeout=settings.REDIS_TIMEOUT,
-                decode_responses=True
+            self.redis_client = aioredis.Redis(
+                connection_pool=get_connection_pool()
             )
             self.ttl = settings.CACHE_TTL
             self.enabled = settings.CACHE_ENABLED
+            self._local = TTLCache(maxsize=settings.L1_MAX, ttl=settings.L1_TTL)
         except redis.ConnectionError as e:
             raise CacheConnectionError(str(e))
         except Exception as e:
             raise CacheConfigurationError(str(e))
 
+    async def close(self) -> None:
+        try:
+            await self.redis_client.aclose()
+            if _connection_pool is not None:
+                await _connection_pool.disconnect()
+        except Exception as e:
+            logger.error(f"Error closing Redis connection: {str(e)}")
+
     def _generate_cache_key(self, key: str, source: str) -> str:
         try:
             key_lower = key.lower().strip()
@@ -46,12 +74,12 @@ class RedisCacheService(ICacheService):
             else:
                 key_content = f"{key_lower}:{source}"
                 
-            hashed = hashlib.sha256(key_content.encode()).hexdigest()
+            hashed = xxhash.xxh3_128_hexdigest(key_content.encode())
             return f"{CachePrefix.COMPANY_INFO}:{hashed}"
         except Exception as e:
             raise CacheKeyError(str(e))
 
-    def _calculate_ttl(self, query_type: str) -> int:
+    def _calculate_ttl(self, query_type: QueryType) -> int:
         return TTL_MAPPING.get(query_type, CacheTTL.DEFAULT)
 
     @log_error(logger)
@@ -61,21 +89,56 @@ class RedisCacheService(ICacheService):
             
         try:
             cache_key = self._generate_cache_key(key, source)
-            cached_data = self.redis_client.get(cache_key)
-            
+
+            local_data = self._local.get(cache_key)
+            if local_data is not None:
+                logger.info(f"Local cache hit for key: {cache_key}")
+                return local_data
+
+            cached_data = await self.redis_client.get(cache_key)
+
             if cached_data:
                 logger.info(f"Cache hit for key: {cache_key}")
                 try:
-                    return json.loads(cached_data)
-                except json.JSONDecodeError as e:
+                    parsed = orjson.loads(cached_data)
+                except orjson.JSONDecodeError as e:
                     raise CacheSerializationError("deserialization", str(e))
-                    
+                self._local[cache_key] = parsed
+                return parsed
+
             logger.info(f"Cache miss for key: {cache_key}")
             return None
             
         except redis.RedisError as e:
             raise CacheOperationError("get", str(e))
 
+    @log_error(logger)
+    async def mget_cached(self, entries: list) -> list:
+        """Fetch several (key, source) entries in a single MGET round-trip."""
+        if not self.enabled:
+            return [None] * len(entries)
+
+        try:
+            cache_keys = [self._generate_cache_key(key, source) for key, source in entries]
+            values = [self._local.get(cache_key) for cache_key in cache_keys]
+
+            missing = [i for i, value in enumerate(values) if value is None]
+            if missing:
+                fetched = await self.redis_client.mget([cache_keys[i] for i in missing])
+                for i, raw in zip(missing, fetched):
+                    if raw:
+                        try:
+                            parsed = orjson.loads(raw)
+                        except orjson.JSONDecodeError as e:
+                            raise CacheSerializationError("deserialization", str(e))
+                        self._local[cache_keys[i]] = parsed
+                        values[i] = parsed
+
+            return values
+
+        except redis.RedisError as e:
+            raise CacheOperationError("mget", str(e))
+
     @log_error(logger)
     async def set_cached_data(self, key: str, source: str, data: Dict[str, Any], ttl: Optional[int] = None) -> bool:
         if not self.enabled:
@@ -85,21 +148,22 @@ class RedisCacheService(ICacheService):
             cache_key = self._generate_cache_key(key, source)
             
             try:
-                serialized_data = json.dumps(data)
-            except (TypeError, json.JSONDecodeError) as e:
+                serialized_data = orjson.dumps(data, default=str)
+            except (TypeError, orjson.JSONEncodeError) as e:
                 raise CacheSerializationError("serialization", str(e))
             
             expiration = ttl if ttl is not None else self._calculate_ttl(
-                QueryType.GENERAL.value
+                QueryType.GENERAL
             )
-            
-            success = self.redis_client.setex(
+
+            success = await self.redis_client.setex(
                 cache_key,
                 expiration,
                 serialized_data
             )
-            
+
             if success:
+                self._local[cache_key] = data
                 logger.info(f"Successfully cached data for key: {cache_key}")
             else:
                 logger.warning(f"Failed to cache data for key: {cache_key}")
@@ -116,8 +180,9 @@ class RedisCacheService(ICacheService):
             
         try:
             cache_key = self._generate_cache_key(key, source)
-            success = self.redis_client.delete(cache_key)
-            
+            self._local.pop(cache_key, None)
+            success = await self.redis_client.delete(cache_key)
+
             if success:
                 logger.info(f"Successfully invalidated cache for key: {cache_key}")
             else:
@@ -134,31 +199,37 @@ class RedisCacheService(ICacheService):
             return 0
             
         try:
-            keys = []
-            cursor = 0
-            while True:
-                cursor, partial_keys = self.redis_client.scan(
-                    cursor,
-                    match=f"{CachePrefix.COMPANY_INFO}:{pattern}*",
-                    count=100
-                )
-                keys.extend(partial_keys)
-                if cursor == 0:
-                    break
-            
-            if keys:
-                deleted = self.redis_client.delete(*keys)
-                logger.info(f"Bulk invalidated {deleted} keys matching pattern: {pattern}")
-                return deleted
-            
-            return 0
+            pipe = self.redis_client.pipeline(transaction=False)
+            batch = []
+            queued = 0
+            async for key in self.redis_client.scan_iter(
+                match=f"{CachePrefix.COMPANY_INFO}:{pattern}*",
+                count=500
+            ):
+                batch.append(key)
+                if len(batch) >= 500:
+                    pipe.delete(*batch)
+                    queued += 1
+                    batch = []
+
+            if batch:
+                pipe.delete(*batch)
+                queued += 1
+
+            if not queued:
+                return 0
+
+            self._local.clear()
+            deleted = sum(await pipe.execute())
+            logger.info(f"Bulk invalidated {deleted} keys matching pattern: {pattern}")
+            return deleted
             
         except redis.RedisError as e:
             raise CacheOperationError("bulk_invalidate", str(e))
 
     async def health_check(self) -> bool:
         try:
-            return bool(self.redis_client.ping())
+            return bool(await self.redis_client.ping())
         except Exception as e:
             logger.error(f"Redis health check failed: {str(e)}")
             return False
@@ -166,7 +237,7 @@ class RedisCacheService(ICacheService):
     @log_error(logger)
     async def get_cache_stats(self) -> Dict[str, Any]:
         try:
-            info = self.redis_client.info()
+            info = await self.redis_client.info()
             return {
                 "used_memory": info.get("used_memory_human", "N/A"),
                 "connected_clients": info.get("connected_clients", 0),
@@ -182,6 +253,7 @@ class RedisCacheService(ICacheService):
             return False
             
         try:
-            return bool(self.redis_client.flushdb())
+            self._local.clear()
+            return bool(await self.redis_client.flushdb())
         except redis.RedisError as e:
             raise CacheOperationError("clear_all", str(e))
\ No newline at end of file
@@ -1,5 +1,8 @@
+import asyncio
 import re
 import hashlib
+import xxhash
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any
 from datetime import datetime, timedelta
 from app.models.query import IntentAnalysis, QueryType
@@ -9,6 +12,75 @@ from langchain_community.utilities import WikipediaAPIWrapper
 from langchain_community.tools import TavilySearchResults
 from app.services.cache import RedisCacheService
 
+# Template shapes are constant; only {company} and {tc} vary per call.
+_WIKI_TEMPLATES: Dict[QueryType, str] = {
+    QueryType.LOCATION: "{company} headquarters location company",
+    QueryType.BUSINESS_MODEL: "{company} business model revenue",
+    QueryType.INVESTMENTS: "{company} investments portfolio companies",
+    QueryType.NEWS: "{company} company recent developments",
+    QueryType.CUSTOMERS: "{company} customers clients",
+    QueryType.GENERAL: "{company} company information"
+}
+_WIKI_DEFAULT_TEMPLATE = "{company} company"
+
+_TAVILY_TEMPLATES: Dict[QueryType, tuple] = {
+    QueryType.NEWS: (
+        "latest news about {company} {tc}",
+        "{company} recent news articles {tc}",
+        "{company} press releases {tc}"
+    ),
+    QueryType.LOCATION: (
+        "{company} headquarters current location",
+        "Where is {company} headquartered"
+    ),
+    QueryType.BUSINESS_MODEL: (
+        "How does {company} make money business model",
+        "{company} revenue model business model current"
+    ),
+    QueryType.INVESTMENTS: (
+        "{company} investment portfolio companies",
+        "companies {company} has invested in recent"
+    ),
+    QueryType.CUSTOMERS: (
+        "{company} main customers current",
+        "{company} target market clients"
+    ),
+    QueryType.GENERAL: (
+        "{company} company overview current",
+        "{company} company main information"
+    )
+}
+_TAVILY_DEFAULT_TEMPLATES = ("{company} company information",)
+
+# Dedicated pool for the sync wikipedia client, kept separate from the
+# loop's default executor so slow MediaWiki fetches cannot starve
+# asyncio.to_thread users elsewhere in the process.
+_WIKI_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="wiki")
+
+def _simhash64(text: str) -> int:
+    """64-bit SimHash over token 3-grams of the first 1KB of text.
+
+    Near-identical texts (syndicated copies of the same article) land
+    within a few bits of each other; unrelated texts do not.
+    """
+    tokens = text[:1024].lower().split()
+    if len(tokens) < 3:
+        grams = tokens or [""]
+    else:
+        grams = [" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)]
+
+    weights = [0] * 64
+    for gram in grams:
+        h = xxhash.xxh3_64_intdigest(gram.encode())
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
 class DataRetriever:
     def __init__(self, config: Dict[str, str]):
         self.cache = RedisCacheService()
@@ -24,16 +96,8 @@ class DataRetriever:
             return ""
             
         company = companies[0]
-        query_templates = {
-            QueryType.LOCATION: f"{company} headquarters location company",
-            QueryType.BUSINESS_MODEL: f"{company} business model revenue",
-            QueryType.INVESTMENTS: f"{company} investments portfolio companies",
-            QueryType.NEWS: f"{company} company recent developments",
-            QueryType.CUSTOMERS: f"{company} customers clients",
-            QueryType.GENERAL: f"{company} company information"
-        }
-        
-        return query_templates.get(intent_analysis.query_type, f"{company} company")
+        template = _WIKI_TEMPLATES.get(intent_analysis.query_type, _WIKI_DEFAULT_TEMPLATE)
+        return template.format(company=company)
 
     def _generate_tavily_query(self, intent_analysis: IntentAnalysis) -> str:
         companies = intent_analysis.extracted_entities.get("companies", [])
@@ -41,61 +105,89 @@ class DataRetriever:
             return ""
             
         company = companies[0]
-        current_year = datetime.now().year
         time_constraint = ""
-        
+
         if intent_analysis.query_type == QueryType.NEWS:
             # Son 7 gün için ekledim.
             last_week = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
             time_constraint = f"after:{last_week}"
 
-        query_templates = {
-            QueryType.NEWS: [
-                f"latest news about {company} {time_constraint}",
-                f"{company} recent news articles {time_constraint}",
-                f"{company} press releases {time_constraint}"
-            ],
-            QueryType.LOCATION: [
-                f"{company} headquarters current location",
-                f"Where is {company} headquartered"
-            ],
-            QueryType.BUSINESS_MODEL: [
-                f"How does {company} make money business model",
-                f"{company} revenue model business model current"
-            ],
-            QueryType.INVESTMENTS: [
-                f"{company} investment portfolio companies",
-                f"companies {company} has invested in recent"
-            ],
-            QueryType.CUSTOMERS: [
-                f"{company} main customers current",
-                f"{company} target market clients"
-            ],
-            QueryType.GENERAL: [
-                f"{company} company overview current",
-                f"{company} company main information"
-            ]
-        }
-        
-        queries = query_templates.get(intent_analysis.query_type, [f"{company} company information"])
+        # Only the first template is ever dispatched; don't format the rest.
+        templates = _TAVILY_TEMPLATES.get(intent_analysis.query_type, _TAVILY_DEFAULT_TEMPLATES)
+        query = templates[0].format(company=company, tc=time_constraint)
         if intent_analysis.time_constraints:
-            queries = [f"{q} {intent_analysis.time_constraints}" for q in queries]
-            
-        return queries[0]  #ilk sorguyu kullan
+            query = f"{query} {intent_analysis.time_constraints}"
+
+        return query
+
+    async def retrieve_all(self, intent_analysis: IntentAnalysis) -> Dict[str, Dict[str, Any]]:
+        """Fetch Wikipedia and Tavily data concurrently for one intent.
+
+        Both cache slots are checked in a single MGET round-trip; only the
+        misses dispatch HTTP fetches.
+        """
+        results = {
+            "wikipedia": {"results": [], "source": "Wikipedia"},
+            "tavily": {"results": [], "source": "Tavily"}
+        }
+
+        if not intent_analysis.extracted_entities.get("companies"):
+            return results
+
+        wiki_query = self._generate_wikipedia_query(intent_analysis)
+        tavily_query = self._generate_tavily_query(intent_analysis)
+        cached_wiki = cached_tavily = None
+        try:
+            cached_wiki, cached_tavily = await self.cache.mget_cached([
+                (wiki_query, "wikipedia"),
+                (tavily_query, "Tavily")
+            ])
+        except Exception as e:
+            # Treat both entries as misses; the live fetches below cover it.
+            logger.error(f"Source cache read error: {str(e)}")
+
+        pending = []
+        if cached_wiki:
+            results["wikipedia"] = cached_wiki
+        else:
+            pending.append(("wikipedia", self.retrieve_wikipedia_data(intent_analysis, use_cache=False)))
+
+        if cached_tavily:
+            results["tavily"] = cached_tavily
+        else:
+            pending.append(("tavily", self.retrieve_tavily_data(intent_analysis, use_cache=False)))
+
+        if pending:
+            fetched = await asyncio.gather(
+                *(coro for _, coro in pending),
+                return_exceptions=True
+            )
+            for (source, _), data in zip(pending, fetched):
+                if isinstance(data, Exception):
+                    logger.error(f"{source.capitalize()} retrieval error: {str(data)}")
+                else:
+                    results[source] = data
+
+        return results
 
     @log_error(logger)
-    async def retrieve_wikipedia_data(self, intent_analysis: IntentAnalysis) -> Dict[str, Any]:
+    async def retrieve_wikipedia_data(self, intent_analysis: IntentAnalysis, use_cache: bool = True) -> Dict[str, Any]:
         if not intent_analysis.extracted_entities.get("companies"):
             return {"results": [], "source": "Wikipedia"}
             
         query = self._generate_wikipedia_query(intent_analysis)
         
-        cached_data = await self.cache.get_cached_data(query, "wikipedia")
-        if cached_data:
-            return cached_data
+        if use_cache:
+            cached_data = await self.cache.get_cached_data(query, "wikipedia")
+            if cached_data:
+                return cached_data
         
         try:
-            wiki_result = await self.wikipedia.arun(query)
+            # WikipediaQueryRun wraps the sync wikipedia library; run it on
+            # the dedicated pool instead of the shared default executor.
+            wiki_result = await asyncio.get_running_loop().run_in_executor(
+                _WIKI_EXECUTOR, self.wikipedia.run, query
+            )
             if wiki_result:
                 return {
                     "results": [{
@@ -110,16 +202,35 @@ class DataRetriever:
             
         return {"results": [], "source": "Wikipedia"}
 
+    def _dedup_results(self, results: List[Dict[str, Any]], hamming_threshold: int = 4) -> List[Dict[str, Any]]:
+        """Drop near-duplicate results, keeping the first of each cluster.
+
+        Fingerprints are stored on the items, so cache hits carry them and
+        dedup cost is not re-paid.
+        """
+        kept: List[Dict[str, Any]] = []
+        fingerprints: List[int] = []
+        for item in results:
+            fp = item.get("fp")
+            if fp is None:
+                fp = _simhash64(str(item.get("content", "")))
+                item["fp"] = fp
+            if any((fp ^ seen).bit_count() <= hamming_threshold for seen in fingerprints):
+                continue
+            fingerprints.append(fp)
+            kept.append(item)
+        return kept
+
     @log_error(logger)
-    async def retrieve_tavily_data(self, intent_analysis: IntentAnalysis) -> Dict[str, Any]:
+    async def retrieve_tavily_data(self, intent_analysis: IntentAnalysis, use_cache: bool = True) -> Dict[str, Any]:
         if not intent_analysis.extracted_entities.get("companies"):
             return {"results": [], "source": "Tavily"}
         
         query = self._generate_tavily_query(intent_analysis)
-        cached_data = await self.cache.get_cached_data(query, "Tavily")  
-        
-        if cached_data:
-            return cached_data
+        if use_cache:
+            cached_data = await self.cache.get_cached_data(query, "Tavily")
+            if cached_data:
+                return cached_data
         try:
             tavily_results = await self.tavily.arun(query)
             
@@ -136,12 +247,12 @@ class DataRetriever:
                 tavily_results = filtered_results or tavily_results
             
             return {
-                "results": [{
+                "results": self._dedup_results([{
                     "content": item.get("content"),
                     "source": "Tavily",
                     "url": item.get("url"),
                     "query": query
-                } for item in tavily_results if isinstance(item, dict) and item.get("content")],
+                } for item in tavily_results if isinstance(item, dict) and item.get("content")]),
                 "source": "Tavily"
             }
         except Exception as e:
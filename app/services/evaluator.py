@@ -1,13 +1,35 @@
 import re
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlsplit
+import xxhash
 from app.models.response import ValidationResult, Source, ValidationDetails
 from app.models.query import QueryAnalysis
+from app.services.llm import get_llm
 from app.utils.logger import logger, log_error
-from langchain_openai import AzureChatOpenAI
-from langchain.output_parsers import PydanticOutputParser
 from langchain.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
+try:
+    # RE2 matches in linear time, bounding worst-case cost on arbitrarily
+    # long article bodies; wheels are unavailable on some platforms.
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+# Single alternation replacing three sequential re.sub passes; runs of dots
+# collapse to one dot, bracketed text and boilerplate are dropped.
+_RE_NEWS_CLEAN = _re_engine.compile(r'\[.*?\]|\(Opens in new window\)|\.{2,}')
+_RE_SENTENCE_END = _re_engine.compile(r'[.!?]')
+
+def _news_clean_repl(match: re.Match) -> str:
+    return '.' if match.group(0).startswith('.') else ''
+
+# Upper bound on the data block injected into the evaluation prompt; tokens
+# dominate Azure latency and cost, and extra snippets past this point add
+# little signal.
+_EVAL_DATA_CHAR_BUDGET = 4000
+
 class EvaluationOutput(BaseModel):
     main_points: List[str] = Field(
         description="List of main points found in the data"
@@ -29,38 +51,35 @@ class EvaluationOutput(BaseModel):
 
 class DataEvaluator:
     def __init__(self, config: Dict[str, str]):
-        self.llm = AzureChatOpenAI(
-            azure_deployment=config["AZURE_OPENAI_DEPLOYMENT_NAME"],
-            openai_api_version=config["AZURE_OPENAI_API_VERSION"],
-            azure_endpoint=config["AZURE_OPENAI_ENDPOINT"],
-            openai_api_key=config["AZURE_OPENAI_API_KEY"],
-            temperature=0,
-            model_kwargs={"response_format": {"type": "json_object"}} 
-        )
-        
-        self.parser = PydanticOutputParser(pydantic_object=EvaluationOutput)
-        
+        self.llm = get_llm(config)
+
+        # Server-side schema enforcement: the model returns a parsed
+        # EvaluationOutput directly, with no format instructions in the
+        # prompt and no Python-side JSON re-parse.
+        self.llm_structured = self.llm.with_structured_output(EvaluationOutput)
+
+        # Static instructions live entirely in the system message so the
+        # prompt prefix is byte-identical across calls and eligible for
+        # server-side prompt caching; only the user turn varies.
         self.evaluation_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a data validator that evaluates information quality and completeness. 
-            Always provide responses in valid JSON format."""),
+            ("system", """You are a data validator that evaluates information quality and completeness.
+            Always provide responses in valid JSON format.
+
+            Evaluate the information and provide:
+            1. Main points found
+            2. Missing important information
+            3. Confidence score (0-1)
+            4. Brief summary
+            5. Source quality scores"""),
             ("user", """
             Analyze this query and retrieved data:
-            
+
             Query: {query}
             Query Type: {query_type}
             Companies Mentioned: {companies}
-            
+
             Retrieved Data:
             {data}
-            
-            Evaluate the information and provide:
-            1. Main points found
-            2. Missing important information
-            3. Confidence score (0-1)
-            4. Brief summary
-            5. Source quality scores
-            
-            {format_instructions}
             """)
         ])
     
@@ -89,11 +108,10 @@ class DataEvaluator:
                 "query": query_analysis.original_query,
                 "query_type": query_analysis.intent_analysis.query_type.value,
                 "companies": companies or "Not specified",
-                "data": formatted_data,
-                "format_instructions": self.parser.get_format_instructions()
+                "data": formatted_data
             }
             
-            evaluation_chain = self.evaluation_prompt | self.llm | self.parser
+            evaluation_chain = self.evaluation_prompt | self.llm_structured
             evaluation = await evaluation_chain.ainvoke(evaluation_input)
             
             return ValidationResult(
@@ -112,17 +130,25 @@ class DataEvaluator:
     
     def _format_data_for_evaluation(self, combined_data: List[Dict]) -> str:
         formatted_data = []
-        
+        budget = _EVAL_DATA_CHAR_BUDGET
+
         for item in combined_data:
             if not isinstance(item, dict):
                 continue
-                
+
             source = item.get('source', 'Unknown')
-            content = item.get('content', '').strip()
-            
+            # Slice before stripping so a 50KB article never gets copied
+            # whole; the extra 20 chars absorb leading whitespace.
+            raw = item.get('content') or ''
+            content = raw[:520].strip()[:500]
+
             if content:
-                formatted_data.append(f"Source({source}):\n{content[:500]}")
-        
+                snippet = f"Source({source}):\n{content}"
+                if len(snippet) > budget:
+                    break
+                formatted_data.append(snippet)
+                budget -= len(snippet)
+
         return "\n\n".join(formatted_data)
     
     def _format_final_response(self, validation_result: ValidationResult, retrieved_data: Dict[str, List[Any]]) -> str:
@@ -136,44 +162,27 @@ class DataEvaluator:
             
             is_news_query = any("news" in str(item.get("query", "")).lower() for item in combined_data)
             if is_news_query:
-                news_items = []
-                seen_content = set()
-                
+                # First occurrence wins so the source credited for a
+                # syndicated item stays stable.
+                unique = {}
                 for item in combined_data:
-                    if not isinstance(item, dict):
-                        continue
-                        
-                    content = item.get("content", "")
-                    if not content or not isinstance(content, str):
-                        continue
-                    
-                    content = re.sub(r'\[.*?\]', '', content) 
-                    content = re.sub(r'\(Opens in new window\)', '', content)
-                    content = re.sub(r'\.{2,}', '.', content)
-                    content = ' '.join(content.split())
-                    
-                    if len(content) > 200:
-                        first_sentence = re.split(r'[.!?]', content)[0]
-                        if first_sentence:
-                            content = first_sentence + "."
-                    
-                    if len(content) < 20 or content in seen_content:
-                        continue
-                    
-                    seen_content.add(content)
-                    source = item.get("source", "Unknown")
-                    url = item.get("url", "")
-                    
-                    news_item = f"• {content}"
-                    if url:
-                        news_item += f" (Source: {source}, {url})"
-                    elif source:
-                        news_item += f" (Source: {source})"
-                    
+                    cleaned = self._clean_news_item(item)
+                    if cleaned:
+                        unique.setdefault(cleaned["key"], cleaned)
+                    if len(unique) == 3:
+                        break
+
+                news_items = []
+                for item in unique.values():
+                    news_item = f"• {item['content']}"
+                    if item["url"]:
+                        news_item += f" (Source: {item['source']}, {item['url']})"
+                    elif item["source"]:
+                        news_item += f" (Source: {item['source']})"
                     news_items.append(news_item)
-                
+
                 if news_items:
-                    return "Latest news:\n\n" + "\n\n".join(news_items[:3])
+                    return "Latest news:\n\n" + "\n\n".join(news_items)
                 return "No recent news found for this query."
             
             if validation_result.validation_details and validation_result.validation_details.key_findings:
@@ -202,26 +211,61 @@ class DataEvaluator:
             logger.error(f"Error in formatting response: {str(e)}")
             return "An error occurred while formatting the response."
     
+    def _clean_news_item(self, item: Any) -> Optional[Dict[str, Any]]:
+        """Clean one news result; returns None for unusable items.
+
+        The key field is an xxh3 digest of the cleaned content, used for
+        order-preserving dedup without keeping full strings around.
+        """
+        if not isinstance(item, dict):
+            return None
+
+        content = item.get("content", "")
+        if not content or not isinstance(content, str):
+            return None
+
+        content = _RE_NEWS_CLEAN.sub(_news_clean_repl, content)
+        content = ' '.join(content.split())
+
+        if len(content) > 200:
+            first_sentence = _RE_SENTENCE_END.split(content)[0]
+            if first_sentence:
+                content = first_sentence + "."
+
+        if len(content) < 20:
+            return None
+
+        return {
+            "key": xxhash.xxh3_64_intdigest(content.encode()),
+            "content": content,
+            "source": item.get("source", "Unknown"),
+            "url": item.get("url", "")
+        }
+
     def _calculate_source_reliability(self, url: str, item: Dict[str, Any]) -> float:
-        base_score = 0.7 
-        
-        if "wikipedia.org" in str(url).lower():
+        url_l = str(url).lower()
+
+        if "wikipedia.org" in url_l:
             base_score = 0.8
-        elif any(domain in str(url).lower() for domain in [".gov", ".edu"]):
+        elif ".gov" in url_l or ".edu" in url_l:
             base_score = 0.9
         elif "news" in str(item.get("content", "")).lower():
             base_score = 0.75
-        
+        else:
+            base_score = 0.7
+
         return round(base_score, 2)
-    
-    def _get_source_name(self, url: str) -> str:
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_source_name(url: str) -> str:
+        # The same domains recur across Tavily results, so cache by URL.
         if isinstance(url, str):
             if "wikipedia.org" in url.lower():
                 return "Wikipedia"
             try:
-                from urllib.parse import urlparse
-                domain = urlparse(url).netloc
+                domain = urlsplit(url).netloc
                 return domain.replace("www.", "")
-            except:
+            except ValueError:
                 return url
         return str(url)
\ No newline at end of file
@@ -0,0 +1,55 @@
+from typing import Dict, Optional
+import httpx
+from langchain_openai import AzureChatOpenAI
+from app.utils.logger import logger
+
+_http_client: Optional[httpx.AsyncClient] = None
+_llm_instances: Dict[tuple, AzureChatOpenAI] = {}
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared httpx client used for all Azure OpenAI traffic.
+
+    A single pool keeps TLS sessions warm and multiplexes requests over
+    HTTP/2 instead of every service opening its own sockets.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            http2=True
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        try:
+            await _http_client.aclose()
+        except Exception as e:
+            logger.error("Error closing shared HTTP client: %s", e)
+        _http_client = None
+
+def get_llm(config: Dict[str, str], temperature: float = 0.0) -> AzureChatOpenAI:
+    """Return a shared AzureChatOpenAI for this deployment and temperature.
+
+    Per-call differences (structured output schemas, extra kwargs) should
+    be derived via with_structured_output/bind rather than new instances.
+    """
+    key = (
+        config["AZURE_OPENAI_DEPLOYMENT_NAME"],
+        config["AZURE_OPENAI_API_VERSION"],
+        config["AZURE_OPENAI_ENDPOINT"],
+        temperature
+    )
+    llm = _llm_instances.get(key)
+    if llm is None:
+        llm = AzureChatOpenAI(
+            azure_deployment=config["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            openai_api_version=config["AZURE_OPENAI_API_VERSION"],
+            azure_endpoint=config["AZURE_OPENAI_ENDPOINT"],
+            openai_api_key=config["AZURE_OPENAI_API_KEY"],
+            temperature=temperature,
+            http_async_client=get_http_client()
+        )
+        _llm_instances[key] = llm
+    return llm
@@ -4,22 +4,38 @@ from typing import Any, Callable, Optional
 from app.utils.cache_service import cache_service
 from app.utils.logger import logger
 
+# Pending fire-and-forget cache writes; strong references keep the event
+# loop from garbage-collecting tasks before they finish.
+_pending_writes: set = set()
+
+async def _safe_set(cache_key: str, result: Any, ttl: Optional[int]) -> None:
+    try:
+        await cache_service.set(cache_key, result, ttl)
+    except Exception as e:
+        logger.error(f"Background cache write error: {str(e)}")
+
+def _schedule_set(cache_key: str, result: Any, ttl: Optional[int]) -> None:
+    task = asyncio.create_task(_safe_set(cache_key, result, ttl))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
 def cache(prefix: str, ttl: Optional[int] = None):
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
             try:
                 cache_key = cache_service.generate_key(prefix, *args, **kwargs)
-                cached_result = cache_service.get(cache_key)
-                
+                cached_result = await cache_service.get(cache_key)
+
                 if cached_result is not None:
                     logger.debug(f"Cache hit for key: {cache_key}")
                     return cached_result
-                
+
                 logger.debug(f"Cache miss for key: {cache_key}")
                 result = await func(*args, **kwargs)
-                
-                cache_service.set(cache_key, result, ttl)
+
+                # Don't make the caller pay for the Redis round-trip.
+                _schedule_set(cache_key, result, ttl)
                 return result
                 
             except Exception as e:
@@ -30,16 +46,16 @@ def cache(prefix: str, ttl: Optional[int] = None):
         def sync_wrapper(*args, **kwargs) -> Any:
             try:
                 cache_key = cache_service.generate_key(prefix, *args, **kwargs)
-                cached_result = cache_service.get(cache_key)
-                
+                cached_result = cache_service.get_sync(cache_key)
+
                 if cached_result is not None:
                     logger.debug(f"Cache hit for key: {cache_key}")
                     return cached_result
-                
+
                 logger.debug(f"Cache miss for key: {cache_key}")
                 result = func(*args, **kwargs)
-                
-                cache_service.set(cache_key, result, ttl)
+
+                cache_service.set_sync(cache_key, result, ttl)
                 return result
                 
             except Exception as e:
@@ -1,85 +1,428 @@
-import json
+import asyncio
+import os
+import threading
+import time
+import msgspec
+import orjson
+import xxhash
 import redis
+import redis.asyncio as aioredis
+import zstandard as zstd
+from cachetools import TTLCache
+from functools import lru_cache
 from typing import Any, Optional
 from app.config import get_settings
 from app.utils.logger import logger
 
 settings = get_settings()
 
+# Module-level bindings for hot-path reads; enabled stays an instance
+# attribute because a failed connection toggles it at runtime.
+_CACHE_TTL = settings.CACHE_TTL
+
+# One-byte format version tag prefixed to every payload, so a codec
+# change can coexist with entries written by older processes instead of
+# poisoning reads. v1 is plain msgpack; v2 adds a codec byte ("z" for
+# zstd-compressed msgpack, "r" for raw) so large blobs travel compressed.
+_FORMAT_V1 = b"\x01"
+_FORMAT_V2 = b"\x02"
+_packer = msgspec.msgpack.Encoder(enc_hook=str)
+_unpacker = msgspec.msgpack.Decoder()
+
+# Below this size zstd framing overhead outweighs the saving.
+_COMPRESS_MIN_BYTES = 1024
+_cctx = zstd.ZstdCompressor(level=3)
+_dctx = zstd.ZstdDecompressor()
+
+def _gen_key(prefix: str, args: tuple, kw_items: tuple) -> str:
+    payload = orjson.dumps(
+        [args, dict(kw_items)],
+        option=orjson.OPT_SORT_KEYS,
+        default=str
+    )
+    return f"{prefix}:{xxhash.xxh3_64_hexdigest(payload)}"
+
+_gen_key_cached = lru_cache(maxsize=4096)(_gen_key)
+
+def _encode(value: Any) -> bytes:
+    raw = _packer.encode(value)
+    if len(raw) > _COMPRESS_MIN_BYTES:
+        return _FORMAT_V2 + b"z" + _cctx.compress(raw)
+    return _FORMAT_V2 + b"r" + raw
+
+def _decode(value: bytes) -> Any:
+    tag = value[:1]
+    if tag == _FORMAT_V2:
+        body = value[2:]
+        if value[1:2] == b"z":
+            body = _dctx.decompress(body)
+        return _unpacker.decode(body)
+    if tag == _FORMAT_V1:
+        return _unpacker.decode(value[1:])
+    # Entry written before the format tag existed.
+    return orjson.loads(value)
+
+_pool: Optional[redis.BlockingConnectionPool] = None
+_pool_pid: Optional[int] = None
+
+def _get_pool() -> redis.BlockingConnectionPool:
+    """Return the shared connection pool, rebuilding it after a fork.
+
+    Sockets must never be shared across worker processes, so the pool is
+    keyed on the current pid.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        _pool = redis.BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD or None,
+            connection_class=redis.SSLConnection if settings.REDIS_SSL else redis.Connection,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_TIMEOUT,
+            socket_keepalive=settings.REDIS_SOCKET_KEEPALIVE,
+            # msgpack payloads are bytes end-to-end; decoding to str would
+            # add a UTF-8 pass per read for nothing.
+            decode_responses=False
+        )
+        _pool_pid = pid
+    return _pool
+
+_async_pool: Optional[aioredis.BlockingConnectionPool] = None
+_async_pool_pid: Optional[int] = None
+
+def _get_async_pool() -> aioredis.BlockingConnectionPool:
+    """Async twin of _get_pool, also rebuilt after a fork."""
+    global _async_pool, _async_pool_pid
+    pid = os.getpid()
+    if _async_pool is None or _async_pool_pid != pid:
+        _async_pool = aioredis.BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD or None,
+            connection_class=aioredis.SSLConnection if settings.REDIS_SSL else aioredis.Connection,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_keepalive=settings.REDIS_SOCKET_KEEPALIVE,
+            decode_responses=False
+        )
+        _async_pool_pid = pid
+    return _async_pool
+
 class CacheService:
+    __slots__ = (
+        "client", "aclient", "enabled", "ttl", "_l1",
+        "_healthy", "_health_lock", "_retry_at", "_backoff",
+        "_aget", "_aset", "_adelete", "_amget",
+        "_get", "_set", "_delete"
+    )
+
     def __init__(self):
-        redis_params = {
-            "host": settings.REDIS_HOST,
-            "port": settings.REDIS_PORT,
-            "db": settings.REDIS_DB,
-            "socket_timeout": settings.REDIS_TIMEOUT,
-            "decode_responses": True,
-            "ssl": settings.REDIS_SSL
-        }
-        
-        if settings.REDIS_PASSWORD:
-            redis_params["password"] = settings.REDIS_PASSWORD
-            
-        try:
-            self.client = redis.Redis(**redis_params)
-            self.client.ping()  # Test connection
-            logger.info("Redis connection established successfully")
-        except redis.ConnectionError as e:
-            logger.warning(f"Failed to connect to Redis: {str(e)}. Cache will be disabled.")
-            self.enabled = False
-        else:
-            self.enabled = settings.CACHE_ENABLED
-            
-        self.ttl = settings.CACHE_TTL
-    
-    def get(self, key: str) -> Optional[Any]:
+        # No ping here: connecting at import time delays every worker's
+        # cold start and would disable the cache for the process lifetime
+        # on a single Redis blip. Health is checked lazily on first use.
+        self.client = redis.Redis(connection_pool=_get_pool())
+        self.aclient = aioredis.Redis(connection_pool=_get_async_pool())
+        self.enabled = settings.CACHE_ENABLED
+        self._healthy = False
+        self._health_lock = threading.Lock()
+        self._retry_at = 0.0
+        self._backoff = 1.0
+
+        self.ttl = _CACHE_TTL
+        # In-process L1 in front of Redis; hot keys re-read within L1_TTL
+        # seconds skip the network entirely.
+        self._l1 = TTLCache(maxsize=settings.L1_MAX, ttl=settings.L1_TTL)
+        # Pre-bound client methods skip two attribute lookups per call on
+        # the hot path.
+        self._aget = self.aclient.get
+        self._aset = self.aclient.set
+        self._adelete = self.aclient.delete
+        self._amget = self.aclient.mget
+        self._get = self.client.get
+        self._set = self.client.set
+        self._delete = self.client.delete
+
+    def _ensure_healthy(self) -> bool:
+        """Cheap gate for every cache op: one ping on first use, and an
+        exponentially backed-off re-probe after failures so the cache
+        re-enables itself when Redis recovers."""
+        if not self.enabled:
+            return False
+        if self._healthy:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+
+        with self._health_lock:
+            if self._healthy or time.monotonic() < self._retry_at:
+                return self._healthy
+            try:
+                self.client.ping()
+            except Exception as e:
+                self._retry_at = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2, 30.0)
+                logger.warning(f"Failed to connect to Redis: {str(e)}. Cache will be disabled.")
+                return False
+            else:
+                self._healthy = True
+                self._backoff = 1.0
+                logger.info("Redis connection established successfully")
+                return True
+
+    async def _ensure_healthy_async(self) -> bool:
+        """Async-path twin of _ensure_healthy.
+
+        The fast checks run inline; the blocking ping-under-lock probe is
+        pushed to a thread so a down Redis never stalls the event loop
+        for the socket timeout.
+        """
         if not self.enabled:
+            return False
+        if self._healthy:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        return await asyncio.to_thread(self._ensure_healthy)
+
+    def mark_unhealthy(self) -> None:
+        """Flag the connection for re-probing after an operation error."""
+        self._healthy = False
+        self._retry_at = time.monotonic() + self._backoff
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not await self._ensure_healthy_async():
             return None
-            
+
+        cached = self._l1.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            value = self.client.get(key)
+            value = await self._aget(key)
             if value:
-                return json.loads(value)
+                parsed = _decode(value)
+                self._l1[key] = parsed
+                return parsed
             return None
         except Exception as e:
+            self.mark_unhealthy()
             logger.error(f"Cache get error: {str(e)}")
             return None
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        if not self.enabled:
+
+    def get_sync(self, key: str) -> Optional[Any]:
+        """Blocking read for scripts and sync call sites."""
+        if not self._ensure_healthy():
+            return None
+
+        cached = self._l1.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            value = self._get(key)
+            if value:
+                parsed = _decode(value)
+                self._l1[key] = parsed
+                return parsed
+            return None
+        except Exception as e:
+            self.mark_unhealthy()
+            logger.error(f"Cache get error: {str(e)}")
+            return None
+
+    async def mget(self, keys: list) -> list:
+        """Fetch several keys in one round-trip instead of N GETs."""
+        if not await self._ensure_healthy_async() or not keys:
+            return [None] * len(keys)
+
+        results = [self._l1.get(key) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is None]
+        if not missing:
+            return results
+
+        try:
+            values = await self._amget([keys[i] for i in missing])
+            for i, value in zip(missing, values):
+                if value:
+                    parsed = _decode(value)
+                    self._l1[keys[i]] = parsed
+                    results[i] = parsed
+            return results
+        except Exception as e:
+            self.mark_unhealthy()
+            logger.error(f"Cache mget error: {str(e)}")
+            return results
+
+    async def mset(self, items: dict, ttl: Optional[int] = None) -> bool:
+        """Write several key/value pairs through one pipeline flush."""
+        if not await self._ensure_healthy_async() or not items:
+            return False
+
+        try:
+            expiration = ttl or self.ttl
+            # Transaction off: these are independent SETEXs and MULTI/EXEC
+            # would only add protocol overhead.
+            pipe = self.aclient.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, _encode(value), ex=expiration)
+                self._l1[key] = value
+            await pipe.execute()
+            return True
+        except Exception as e:
+            self.mark_unhealthy()
+            logger.error(f"Cache mset error: {str(e)}")
             return False
-            
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Write a value, deferring the Redis round-trip when possible.
+
+        With the background writer running the call only encodes and
+        enqueues; without one it awaits the round-trip itself.
+        """
+        if not await self._ensure_healthy_async():
+            return False
+
+        try:
+            serialized_value = _encode(value)
+        except Exception as e:
+            logger.error(f"Cache set error: {str(e)}")
+            return False
+
+        self._l1[key] = value
+
+        if _write_queue is not None:
+            _write_queue.put_nowait((key, ttl or self.ttl, serialized_value))
+            return True
+
         try:
-            serialized_value = json.dumps(value, default=str)
-            return bool(self.client.setex(
-                key,
-                ttl or self.ttl,
-                serialized_value
-            ))
+            return bool(await self._aset(key, serialized_value, ex=ttl or self.ttl))
         except Exception as e:
+            self.mark_unhealthy()
+            logger.error(f"Cache set error: {str(e)}")
+            return False
+
+    def set_sync(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Blocking write; completes the Redis round-trip before returning."""
+        if not self._ensure_healthy():
+            return False
+
+        try:
+            serialized_value = _encode(value)
+        except Exception as e:
+            logger.error(f"Cache set error: {str(e)}")
+            return False
+
+        self._l1[key] = value
+        return self._write(key, ttl or self.ttl, serialized_value)
+
+    def _write(self, key: str, ttl: int, payload: bytes) -> bool:
+        try:
+            return bool(self._set(key, payload, ex=ttl))
+        except Exception as e:
+            self.mark_unhealthy()
             logger.error(f"Cache set error: {str(e)}")
             return False
     
-    def delete(self, key: str) -> bool:
-        if not self.enabled:
+    async def delete(self, key: str) -> bool:
+        if not await self._ensure_healthy_async():
             return False
-            
+
+        self._l1.pop(key, None)
         try:
-            return bool(self.client.delete(key))
+            return bool(await self._adelete(key))
         except Exception as e:
+            self.mark_unhealthy()
             logger.error(f"Cache delete error: {str(e)}")
             return False
-    
+
+    def delete_sync(self, key: str) -> bool:
+        if not self._ensure_healthy():
+            return False
+
+        self._l1.pop(key, None)
+        try:
+            return bool(self._delete(key))
+        except Exception as e:
+            self.mark_unhealthy()
+            logger.error(f"Cache delete error: {str(e)}")
+            return False
+
     def generate_key(self, prefix: str, *args, **kwargs) -> str:
-        key_parts = [prefix]
-        
-        if args:
-            key_parts.extend([str(arg) for arg in args])
-            
-        if kwargs:
-            sorted_kwargs = sorted(kwargs.items())
-            key_parts.extend([f"{k}:{v}" for k, v in sorted_kwargs])
-            
-        return ":".join(key_parts)
-
-cache_service = CacheService()
\ No newline at end of file
+        """Build a cache key with a readable prefix and a hashed tail.
+
+        Key length is bounded at len(prefix) + 17 regardless of argument
+        size, keeping bytes-on-wire and Redis key-table entries small.
+        Repeat lookups with the same arguments hit an LRU and skip the
+        serialize-and-hash entirely.
+        """
+        if not args and not kwargs:
+            return prefix
+
+        try:
+            return _gen_key_cached(prefix, args, tuple(sorted(kwargs.items())))
+        except TypeError:
+            # Unhashable argument; compute without memoization.
+            return _gen_key(prefix, args, tuple(kwargs.items()))
+
+cache_service = CacheService()
+
+# Cache writes are not critical-path: the writer drains queued SETEXs
+# into pipeline flushes of up to _FLUSH_MAX_OPS ops or _FLUSH_INTERVAL
+# seconds, whichever comes first.
+_FLUSH_MAX_OPS = 128
+_FLUSH_INTERVAL = 0.005
+
+_write_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+async def _drain_writes() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _write_queue.get()]
+        deadline = loop.time() + _FLUSH_INTERVAL
+        while len(batch) < _FLUSH_MAX_OPS:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_write_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            pipe = cache_service.aclient.pipeline(transaction=False)
+            for key, ttl, payload in batch:
+                pipe.set(key, payload, ex=ttl)
+            await pipe.execute()
+        except Exception as e:
+            cache_service.mark_unhealthy()
+            logger.error(f"Cache write flush error: {str(e)}")
+
+def start_cache_writer() -> None:
+    """Start the background write drainer; call from app startup."""
+    global _write_queue, _writer_task
+    if _writer_task is None or _writer_task.done():
+        _write_queue = asyncio.Queue()
+        _writer_task = asyncio.create_task(_drain_writes())
+
+async def stop_cache_writer() -> None:
+    """Flush pending writes and stop the drainer; call from app shutdown."""
+    global _write_queue, _writer_task
+    if _writer_task is None:
+        return
+    while _write_queue is not None and not _write_queue.empty():
+        await asyncio.sleep(_FLUSH_INTERVAL)
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+    _writer_task = None
+    _write_queue = None
\ No newline at end of file
@@ -1,57 +1,108 @@
 import logging
+import queue
 import sys
-from typing import Any
-import json
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+import orjson
 from datetime import datetime
 from functools import wraps
 from app.config import get_settings
 
 settings = get_settings()
 
+_LOG_LEVEL = settings.LOG_LEVEL
+
+_listener: Optional[QueueListener] = None
+
+# Per-second memo for the ISO timestamp prefix: records arriving within
+# the same second reuse the formatted string and only the microsecond
+# suffix is rebuilt.
+_last_sec = 0
+_last_iso = ""
+
+def _iso_timestamp(created: float) -> str:
+    global _last_sec, _last_iso
+    sec = int(created)
+    if sec != _last_sec or not _last_iso:
+        _last_sec = sec
+        _last_iso = datetime.utcfromtimestamp(sec).isoformat()
+    return f"{_last_iso}.{int((created - sec) * 1_000_000):06d}"
+
 class JsonFormatter(logging.Formatter):
+    # No dynamic attributes beyond what Formatter itself carries.
+    __slots__ = ()
+
     def format(self, record: logging.LogRecord) -> str:
-        log_obj = {
-            "timestamp": datetime.utcnow().isoformat(),
+        # Props merge into the root object as it is built; no intermediate
+        # dict copy before the single serialize.
+        return orjson.dumps({
+            "timestamp": _iso_timestamp(record.created),
             "level": record.levelname,
             "message": record.getMessage(),
             "module": record.module,
             "function": record.funcName,
-        }
-        
-        if hasattr(record, 'props'):
-            log_obj.update(record.props)
-
-        return json.dumps(log_obj)
+            **getattr(record, "props", {})
+        }, default=str).decode()
 
 def setup_logger(name: str = __name__) -> logging.Logger:
+    global _listener
     logger = logging.getLogger(name)
-    
+
     if not logger.handlers:
         handler = logging.StreamHandler(sys.stdout)
         handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
-        
-    logger.setLevel(settings.LOG_LEVEL)
+        # The caller only pays the enqueue; formatting and the stdout
+        # write happen on the listener thread, off the event loop.
+        log_queue = queue.Queue(-1)
+        logger.addHandler(QueueHandler(log_queue))
+        _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+
+    logger.setLevel(_LOG_LEVEL)
     return logger
 
+def shutdown_logging() -> None:
+    """Drain and stop the queue listener; call from app shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class _Lazy:
+    """Defers an expensive stringification until a record is serialized.
+
+    args/kwargs can hold request objects or large payloads; repr only
+    runs if the record is actually emitted, on the listener thread.
+    """
+    __slots__ = ("f",)
+
+    def __init__(self, f):
+        self.f = f
+
+    def __str__(self) -> str:
+        return self.f()
+
 def log_error(logger: logging.Logger):
     def decorator(func: Any):
+        fname = func.__name__
+
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any):
             try:
                 return await func(*args, **kwargs)
             except Exception as e:
-                logger.error(
-                    "Error in function execution",
-                    extra={
-                        "props": {
-                            "function": func.__name__,
-                            "error": str(e),
-                            "args": str(args),
-                            "kwargs": str(kwargs)
+                if logger.isEnabledFor(logging.ERROR):
+                    logger.error(
+                        "Error in function execution",
+                        extra={
+                            "props": {
+                                "function": fname,
+                                "error": str(e),
+                                "args": _Lazy(lambda: repr(args)[:2048]),
+                                "kwargs": _Lazy(lambda: repr(kwargs)[:2048])
+                            }
                         }
-                    }
-                )
+                    )
                 raise
         return wrapper
     return decorator